@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 """
-Real-time RSSI Spectrum GUI for Linux using PyQt5 + Matplotlib.
+Real-time RSSI Spectrum GUI for Linux using PyQt5 + pyqtgraph.
 
 Save as rssi_spectrum_gui.py and run with: python3 rssi_spectrum_gui.py
 
 Dependencies:
-    pip install pyqt5 matplotlib numpy pyairview
+    pip install pyqt5 pyqtgraph numpy pyairview
 
 Functionality:
 - Select serial port (auto-detect /dev/ttyACM* and /dev/ttyUSB*)
 - Start/Stop scanning
-- Real-time plot of RSSI vs frequency (embedded Matplotlib)
+- Real-time plot of RSSI vs frequency (embedded pyqtgraph)
 - Configure RSSI min/max and frequency step via UI
 - Status and basic error handling
 
@@ -23,8 +23,6 @@ Notes:
 import sys
 import glob
 import threading
-import time
-from queue import Queue, Empty
 
 import numpy as np
 from PyQt5 import QtCore, QtWidgets
@@ -32,8 +30,7 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QGroupBox
 )
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import pyqtgraph as pg
 
 # External scanning library used by original script
 import pyairview
@@ -46,27 +43,37 @@ DEFAULT_RSSI_MIN = -100      # dBm
 DEFAULT_RSSI_MAX = -40       # dBm
 
 
-class SpectrumCanvas(FigureCanvas):
+# Scanner threads still stuck in pyairview when the window closed; kept
+# referenced so the running QThread is never destroyed
+_detached_scanners = []
+
+# White background with black axes; must be set before any PlotWidget is created
+pg.setConfigOptions(background='w', foreground='k')
+
+
+class SpectrumCanvas(pg.PlotWidget):
     def __init__(self, start_freq, end_freq, rssi_min, rssi_max, freq_step):
-        self.fig = Figure(figsize=(8, 4))
-        super().__init__(self.fig)
-        self.ax = self.fig.add_subplot(111)
+        super().__init__()
         self.start_freq = start_freq
         self.end_freq = end_freq
         self.rssi_min = rssi_min
         self.rssi_max = rssi_max
         self.freq_step = freq_step
-        self.line, = self.ax.plot([], [], marker='o', linestyle='-')
+        # Persistent curve, updated in place with setData
+        self.curve = self.plot([], [], pen='b', symbol='o', symbolSize=5, symbolPen='b', symbolBrush='b')
+        self._freqs = None
+        self._freqs_n = -1
         self._init_plot()
 
     def _init_plot(self):
-        self.ax.set_title("RSSI Spectrum Analyzer")
-        self.ax.set_xlabel("Frequency (MHz)")
-        self.ax.set_ylabel("RSSI Level (dBm)")
-        self.ax.grid(True)
-        self.ax.set_xlim(self.start_freq, self.end_freq)
-        self.ax.set_ylim(self.rssi_min, self.rssi_max)
-        self.draw()
+        self.setTitle("RSSI Spectrum Analyzer")
+        self.setLabel('bottom', "Frequency (MHz)")
+        self.setLabel('left', "RSSI Level (dBm)")
+        self.showGrid(x=True, y=True)
+        # Fixed axes, as configured from the UI
+        self.setMouseEnabled(x=False, y=False)
+        self.setXRange(self.start_freq, self.end_freq, padding=0)
+        self.setYRange(self.rssi_min, self.rssi_max, padding=0)
 
     def update_limits(self, start_freq, end_freq, rssi_min, rssi_max, freq_step):
         self.start_freq = start_freq
@@ -74,75 +81,105 @@ class SpectrumCanvas(FigureCanvas):
         self.rssi_min = rssi_min
         self.rssi_max = rssi_max
         self.freq_step = freq_step
-        self.ax.set_xlim(self.start_freq, self.end_freq)
-        self.ax.set_ylim(self.rssi_min, self.rssi_max)
+        self.setXRange(self.start_freq, self.end_freq, padding=0)
+        self.setYRange(self.rssi_min, self.rssi_max, padding=0)
+        # Limits changed: invalidate the cached frequency axis
+        self._freqs = None
 
     def plot_rssi(self, rssi_values):
-        if not rssi_values:
+        if len(rssi_values) == 0:
             return
         num_points = len(rssi_values)
-        freqs = np.array([self.start_freq + i * self.freq_step for i in range(num_points)])
-        # Truncate or pad frequencies to match rssi_values length
-        if freqs.size > num_points:
-            freqs = freqs[:num_points]
-        elif freqs.size < num_points:
-            freqs = np.linspace(self.start_freq, self.end_freq, num_points)
-
-        self.ax.cla()
-        self.ax.set_title("RSSI Spectrum Analyzer")
-        self.ax.set_xlabel("Frequency (MHz)")
-        self.ax.set_ylabel("RSSI Level (dBm)")
-        self.ax.grid(True)
-        self.ax.set_xlim(self.start_freq, self.end_freq)
-        self.ax.set_ylim(self.rssi_min, self.rssi_max)
-        self.ax.plot(freqs, rssi_values, marker='o', linestyle='-')
-        self.draw()
-
-
-class ScannerThread(threading.Thread):
-    """Thread that starts the scanner and monitors its running state.
-    It calls pyairview.start_scan(callback=...) which is assumed to return immediately
-    and use the callback to deliver scans. This thread monitors is_scanning() and
-    stops cleanly when requested.
+        # Frequency axis only changes with the limits or the number of points
+        if self._freqs is None or num_points != self._freqs_n:
+            self._freqs = np.arange(num_points, dtype=np.float64) * self.freq_step + self.start_freq
+            self._freqs_n = num_points
+
+        self.curve.setData(self._freqs, rssi_values)
+
+
+class AirviewConnection:
+    """Keeps the pyairview serial connection open across start/stop cycles.
+    The device is only reopened when a different port is requested.
+    """
+
+    def __init__(self):
+        self.port = None
+
+    def ensure(self, port):
+        if self.port == port:
+            return True
+        self.close()
+        # pyairview.connect may raise or return False
+        if not pyairview.connect(port):
+            return False
+        self.port = port
+        return True
+
+    def close(self):
+        if self.port is None:
+            return
+        self.port = None
+        try:
+            pyairview.disconnect()
+        except Exception:
+            pass
+
+
+class ScannerWorker(QtCore.QObject):
+    """Worker that starts the scanner and monitors its running state.
+    It is moved to a QThread and calls pyairview.start_scan(callback=...) which is
+    assumed to return immediately and use the callback to deliver scans. Results are
+    emitted as signals, which Qt marshals to the GUI thread. The worker monitors
+    is_scanning() and stops cleanly when requested.
     """
 
-    def __init__(self, port, callback, stop_event):
-        super().__init__(daemon=True)
+    rssi_ready = QtCore.pyqtSignal(object)
+    status = QtCore.pyqtSignal(str)
+    error = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, port, connection, stop_event):
+        super().__init__()
         self.port = port
-        self.callback = callback
+        self.connection = connection
         self.stop_event = stop_event
+        # Set when the window closes, so the device is released from this thread
+        self.disconnect_on_exit = False
 
     def run(self):
         try:
-            connected = pyairview.connect(self.port)
-            if not connected:
-                # pyairview.connect may raise or return False
-                self.callback('__error__', f'Failed to connect to {self.port}')
+            if not self.connection.ensure(self.port):
+                self.error.emit(f'Failed to connect to {self.port}')
                 return
 
-            self.callback('__status__', f'Connected to {self.port} — starting scan')
+            self.status.emit(f'Connected to {self.port} — starting scan')
             pyairview.start_scan(callback=self._pyairview_callback)
 
             # Monitor scanning until stop requested or pyairview reports not scanning
-            while not self.stop_event.is_set() and pyairview.is_scanning():
-                time.sleep(0.5)
+            # A stop request wakes the wait immediately; is_scanning() is only
+            # re-checked when the timeout elapses
+            while not self.stop_event.wait(0.5):
+                if not pyairview.is_scanning():
+                    break
 
             # If stop requested and still scanning, request stop
             if pyairview.is_scanning():
                 pyairview.stop_scan()
 
         except Exception as e:
-            self.callback('__error__', f'Scanner error: {e}')
+            # Drop the connection so the next start reopens the device
+            self.connection.close()
+            self.error.emit(f'Scanner error: {e}')
         finally:
-            try:
-                pyairview.disconnect()
-            except Exception:
-                pass
-            self.callback('__status__', 'Disconnected')
+            if self.disconnect_on_exit:
+                self.connection.close()
+            self.status.emit('Scan stopped')
+            self.finished.emit()
 
     def _pyairview_callback(self, rssi_list):
-        # Deliver real RSSI data via the UI callback
-        self.callback('rssi', rssi_list)
+        # Deliver real RSSI data to the GUI thread as a compact int16 array
+        self.rssi_ready.emit(np.asarray(rssi_list, dtype=np.int16))
 
 
 class MainWindow(QMainWindow):
@@ -151,8 +188,11 @@ class MainWindow(QMainWindow):
         self.setWindowTitle('RSSI Spectrum — GUI')
         self.setMinimumSize(900, 520)
 
-        # Internal queue for incoming plot data
-        self.plot_queue = Queue()
+        # Newest RSSI frame delivered by the scanner. The scanner thread stores
+        # into the single-slot box, the draw timer takes and clears it.
+        self.latest_data = np.empty(0, dtype=np.int16)
+        self._latest_slot = [None]
+        self._slot_lock = threading.Lock()
 
         # Default parameters
         self.start_freq = DEFAULT_START_FREQ
@@ -161,17 +201,23 @@ class MainWindow(QMainWindow):
         self.rssi_min = DEFAULT_RSSI_MIN
         self.rssi_max = DEFAULT_RSSI_MAX
 
-        # Scanner control
+        # Scanner control; the serial connection outlives individual scans
+        self.connection = AirviewConnection()
         self.scanner_thread = None
-        self.scanner_stop_event = threading.Event()
+        self.scanner = None
+        self.scanner_stop_event = None
+
+        # Last detected port list, to skip rebuilding an unchanged combo box
+        self._last_ports = None
 
         self._init_ui()
 
-        # Timer to poll queue and update plot
-        self.update_timer = QtCore.QTimer()
-        self.update_timer.setInterval(200)  # ms
-        self.update_timer.timeout.connect(self._process_plot_queue)
-        self.update_timer.start()
+        # Timer to redraw only when new data arrived, so draw cost does not
+        # gate data latency
+        self.draw_timer = QtCore.QTimer()
+        self.draw_timer.setInterval(50)  # ms
+        self.draw_timer.timeout.connect(self._redraw_if_dirty)
+        self.draw_timer.start()
 
     def _init_ui(self):
         central = QWidget()
@@ -266,12 +312,20 @@ class MainWindow(QMainWindow):
         # Find common serial devices on Linux
         ports = glob.glob('/dev/ttyACM*') + glob.glob('/dev/ttyUSB*')
         ports = sorted(set(ports))
+        if ports == self._last_ports:
+            return
+        self._last_ports = ports
+        current = self.port_combo.currentText()
         self.port_combo.clear()
         if not ports:
             self.port_combo.addItem('/dev/ttyACM0')
         else:
             for p in ports:
                 self.port_combo.addItem(p)
+        # Keep the user's selection if the port is still present
+        idx = self.port_combo.findText(current)
+        if idx >= 0:
+            self.port_combo.setCurrentIndex(idx)
 
     def _update_limits_from_ui(self):
         self.start_freq = float(self.start_freq_spin.value())
@@ -290,59 +344,87 @@ class MainWindow(QMainWindow):
 
     def _on_start(self):
         port = self.port_combo.currentText()
-        self.scanner_stop_event.clear()
-        # Create and start scanner thread
-        self.scanner_thread = ScannerThread(port=port, callback=self._scanner_callback_from_thread, stop_event=self.scanner_stop_event)
+        # Each worker gets its own stop event, so a previous worker that is
+        # still shutting down can never be revived by this start
+        self.scanner_stop_event = threading.Event()
+        # Create the scanner worker and run it in its own QThread, owned by
+        # the window and deleted once it has finished
+        self.scanner_thread = QtCore.QThread(self)
+        self.scanner = ScannerWorker(port=port, connection=self.connection, stop_event=self.scanner_stop_event)
+        self.scanner.moveToThread(self.scanner_thread)
+        self.scanner_thread.started.connect(self.scanner.run)
+        # quit() is thread-safe: call it directly from the worker thread so
+        # the thread exits even while the GUI thread is blocked
+        self.scanner.finished.connect(self.scanner_thread.quit, QtCore.Qt.DirectConnection)
+        self.scanner_thread.finished.connect(self.scanner.deleteLater)
+        self.scanner_thread.finished.connect(self.scanner_thread.deleteLater)
+        self.scanner_thread.finished.connect(self._on_scanner_finished)
+        # Direct connection: _on_rssi runs in the scanner thread and only
+        # stores the frame, so no event is posted per frame
+        self.scanner.rssi_ready.connect(self._on_rssi, QtCore.Qt.DirectConnection)
+        self.scanner.status.connect(self.status_label.setText, QtCore.Qt.QueuedConnection)
+        self.scanner.error.connect(self._on_scanner_error, QtCore.Qt.QueuedConnection)
         self.scanner_thread.start()
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.status_label.setText('Starting...')
 
     def _on_stop(self):
+        # The scanner thread wakes on the event and calls stop_scan() itself,
+        # so the GUI thread never blocks on pyairview. Start is re-enabled
+        # once the scanner thread has actually finished.
         self.scanner_stop_event.set()
-        # If pyairview exposes stop_scan directly, call it to speed up stop
-        try:
-            if pyairview.is_scanning():
-                pyairview.stop_scan()
-        except Exception:
-            pass
+        self.stop_btn.setEnabled(False)
+        self.status_label.setText('Stopping...')
 
+    def _on_scanner_finished(self):
+        # The scanner thread has exited; it is now safe to start another one
+        self.scanner = None
+        self.scanner_thread = None
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.status_label.setText('Stopping...')
 
-    def _scanner_callback_from_thread(self, tag, payload):
-        # This method is called from the scanner thread.
-        # Forward messages to the Qt main thread via signals (use Qt's event loop)
-        if tag == 'rssi':
-            self.plot_queue.put(payload)
-        elif tag == '__status__':
-            QtCore.QMetaObject.invokeMethod(self.status_label, 'setText', QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, payload))
-        elif tag == '__error__':
-            QtCore.QMetaObject.invokeMethod(self.status_label, 'setText', QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, f'ERROR: {payload}'))
-
-    def _process_plot_queue(self):
-        # Called by QTimer in the GUI thread
-        try:
-            while True:
-                data = self.plot_queue.get_nowait()
-                # Expect data to be a list of integers
-                if isinstance(data, list) and data:
-                    # Plot values
-                    self.canvas.plot_rssi(data)
-                    self.status_label.setText(f'Last update: {len(data)} points')
-        except Empty:
-            pass
+    def _on_scanner_error(self, message):
+        self.status_label.setText(f'ERROR: {message}')
+
+    def _on_rssi(self, data):
+        # Runs in the scanner thread. Overwrite the slot with the newest frame;
+        # the draw timer plots it, so intermediate frames are never drawn.
+        # Expect data to be an int16 array of readings
+        if isinstance(data, np.ndarray) and data.size:
+            with self._slot_lock:
+                self._latest_slot[0] = data
+
+    def _redraw_if_dirty(self):
+        # Called by draw_timer in the GUI thread
+        with self._slot_lock:
+            data = self._latest_slot[0]
+            self._latest_slot[0] = None
+        if data is None:
+            return
+        self.latest_data = data
+        self.canvas.plot_rssi(self.latest_data)
+        self.status_label.setText(f'Last update: {len(self.latest_data)} points')
 
     def closeEvent(self, event):
-        # Ensure scanner stops and resources cleaned
-        self.scanner_stop_event.set()
-        try:
-            if pyairview.is_scanning():
-                pyairview.stop_scan()
-            pyairview.disconnect()
-        except Exception:
-            pass
+        # Ensure scanner stops and resources cleaned; a running scanner
+        # stops the scan and disconnects the device on its way out
+        stopped = True
+        if self.scanner_thread is not None:
+            self.scanner.disconnect_on_exit = True
+            self.scanner_stop_event.set()
+            self.scanner_thread.quit()
+            stopped = self.scanner_thread.wait(2000)
+            if not stopped:
+                # Scanner is stuck inside a pyairview call: close anyway, but
+                # detach its thread so it is not destroyed while running. The
+                # worker still disconnects if the call ever returns.
+                self.scanner_thread.setParent(None)
+                _detached_scanners.append((self.scanner_thread, self.scanner))
+        if stopped:
+            # No scanner thread is running, so nothing else can be inside
+            # pyairview (no-op if the worker already closed it)
+            self.connection.close()
         event.accept()
 
 
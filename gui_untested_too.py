@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 """
-Comprehensive Real-time RSSI Spectrum GUI for Linux using PyQt5 + Matplotlib.
+Comprehensive Real-time RSSI Spectrum GUI for Linux using PyQt5 + pyqtgraph.
 
 Features:
 - Auto-detects serial ports (/dev/ttyACM*, /dev/ttyUSB*)
 - Start/Stop scan
-- Real-time RSSI vs Frequency graph (Matplotlib embedded)
+- Real-time RSSI vs Frequency graph (pyqtgraph embedded)
 - Adjustable frequency/rssi range and step size
 - Logging to file with timestamps
 - Configurable scan interval
@@ -13,7 +13,7 @@ Features:
 - Error handling and status reporting
 
 Dependencies:
-    pip install pyqt5 matplotlib numpy pyairview
+    pip install pyqt5 pyqtgraph numpy pyairview
 
 Run:
     python3 rssi_spectrum_gui.py
@@ -28,9 +28,8 @@ import glob
 import csv
 import os
 import threading
-import time
+from collections import deque
 from datetime import datetime
-from queue import Queue, Empty
 
 import numpy as np
 from PyQt5 import QtCore, QtWidgets
@@ -39,8 +38,7 @@ from PyQt5.QtWidgets import (
     QLabel, QPushButton, QComboBox, QSpinBox, QDoubleSpinBox, QGroupBox,
     QFileDialog, QCheckBox
 )
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import pyqtgraph as pg
 
 # External scanning library
 import pyairview
@@ -53,88 +51,215 @@ DEFAULT_RSSI_MAX = -40
 DEFAULT_SCAN_INTERVAL = 2.5  # seconds
 
 
-class SpectrumCanvas(FigureCanvas):
+# Scanner threads still stuck in pyairview when the window closed; kept
+# referenced so the running QThread is never destroyed
+_detached_scanners = []
+
+# White background with black axes; must be set before any PlotWidget is created
+pg.setConfigOptions(background='w', foreground='k')
+
+
+class SpectrumCanvas(pg.PlotWidget):
     def __init__(self, start_freq, end_freq, rssi_min, rssi_max, freq_step):
-        self.fig = Figure(figsize=(8, 4))
-        super().__init__(self.fig)
-        self.ax = self.fig.add_subplot(111)
+        super().__init__()
         self.start_freq = start_freq
         self.end_freq = end_freq
         self.rssi_min = rssi_min
         self.rssi_max = rssi_max
         self.freq_step = freq_step
+        # Persistent curve, updated in place with setData
+        self.curve = self.plot([], [], pen='b', symbol='o', symbolSize=5, symbolPen='b', symbolBrush='b')
+        self._freqs = None
+        self._freqs_n = -1
         self._init_plot()
 
     def _init_plot(self):
-        self.ax.set_title("RSSI Spectrum Analyzer")
-        self.ax.set_xlabel("Frequency (MHz)")
-        self.ax.set_ylabel("RSSI Level (dBm)")
-        self.ax.grid(True)
-        self.ax.set_xlim(self.start_freq, self.end_freq)
-        self.ax.set_ylim(self.rssi_min, self.rssi_max)
-        self.draw()
+        self.setTitle("RSSI Spectrum Analyzer")
+        self.setLabel('bottom', "Frequency (MHz)")
+        self.setLabel('left', "RSSI Level (dBm)")
+        self.showGrid(x=True, y=True)
+        # Fixed axes, as configured from the UI
+        self.setMouseEnabled(x=False, y=False)
+        self.setXRange(self.start_freq, self.end_freq, padding=0)
+        self.setYRange(self.rssi_min, self.rssi_max, padding=0)
 
     def update_limits(self, start_freq, end_freq, rssi_min, rssi_max, freq_step):
         self.start_freq, self.end_freq = start_freq, end_freq
         self.rssi_min, self.rssi_max = rssi_min, rssi_max
         self.freq_step = freq_step
-        self.ax.set_xlim(start_freq, end_freq)
-        self.ax.set_ylim(rssi_min, rssi_max)
+        self.setXRange(start_freq, end_freq, padding=0)
+        self.setYRange(rssi_min, rssi_max, padding=0)
+        self._freqs = None
 
     def plot_rssi(self, rssi_values):
-        if not rssi_values:
+        if len(rssi_values) == 0:
             return
-        freqs = np.linspace(self.start_freq, self.end_freq, len(rssi_values))
-        self.ax.cla()
-        self._init_plot()
-        self.ax.plot(freqs, rssi_values, marker='o', linestyle='-', color='b', alpha=0.8)
-        self.draw()
+        n = len(rssi_values)
+        if self._freqs is None or n != self._freqs_n:
+            self._freqs = np.linspace(self.start_freq, self.end_freq, n)
+            self._freqs_n = n
+        self.curve.setData(self._freqs, rssi_values)
 
 
-class ScannerThread(threading.Thread):
-    def __init__(self, port, interval, callback, stop_event):
-        super().__init__(daemon=True)
+class AirviewConnection:
+    """Keeps the pyairview serial connection open across start/stop cycles.
+    The device is only reopened when a different port is requested.
+    """
+
+    def __init__(self):
+        self.port = None
+
+    def ensure(self, port):
+        if self.port == port:
+            return True
+        self.close()
+        # pyairview.connect may raise or return False
+        if not pyairview.connect(port):
+            return False
+        self.port = port
+        return True
+
+    def close(self):
+        if self.port is None:
+            return
+        self.port = None
+        try:
+            pyairview.disconnect()
+        except Exception:
+            pass
+
+
+class ScannerWorker(QtCore.QObject):
+    rssi_ready = QtCore.pyqtSignal(object)
+    status = QtCore.pyqtSignal(str)
+    error = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, port, interval, connection, stop_event):
+        super().__init__()
         self.port = port
         self.interval = interval
-        self.callback = callback
+        self.connection = connection
         self.stop_event = stop_event
+        # Set when the window closes, so the device is released from this thread
+        self.disconnect_on_exit = False
 
     def run(self):
         try:
-            if not pyairview.connect(self.port):
-                self.callback('__error__', f'Failed to connect to {self.port}')
+            if not self.connection.ensure(self.port):
+                self.error.emit(f'Failed to connect to {self.port}')
                 return
 
-            self.callback('__status__', f'Connected to {self.port}')
+            self.status.emit(f'Connected to {self.port}')
             pyairview.start_scan(callback=self._rssi_callback)
 
-            while not self.stop_event.is_set() and pyairview.is_scanning():
-                time.sleep(self.interval)
+            # A stop request wakes the wait immediately; is_scanning() is only
+            # re-checked when the timeout elapses
+            while not self.stop_event.wait(self.interval):
+                if not pyairview.is_scanning():
+                    break
 
             if pyairview.is_scanning():
                 pyairview.stop_scan()
         except Exception as e:
-            self.callback('__error__', f'Scanner error: {e}')
+            self.connection.close()
+            self.error.emit(f'Scanner error: {e}')
         finally:
-            try:
-                pyairview.disconnect()
-            except Exception:
-                pass
-            self.callback('__status__', 'Disconnected')
+            if self.disconnect_on_exit:
+                self.connection.close()
+            self.status.emit('Scan stopped')
+            self.finished.emit()
 
     def _rssi_callback(self, rssi_list):
-        self.callback('rssi', rssi_list)
+        self.rssi_ready.emit(np.asarray(rssi_list, dtype=np.int16))
+
+
+class LogWriter(threading.Thread):
+    """Background thread that appends logged RSSI frames to a CSV file.
+    Frames are pushed into a bounded deque; when it is full the oldest frames
+    are dropped. deque.append and popleft are atomic, so the producer and this
+    thread need no extra lock; a hand-rolled index ring cannot both release
+    drained slots and stay safe when the producer laps the writer. The file is
+    opened on the first frame and kept open. If opening or writing fails,
+    on_error is called with a message and further frames are ignored.
+    """
+
+    def __init__(self, path, on_error=None, maxlen=4096):
+        super().__init__(daemon=True)
+        self.path = path
+        self.on_error = on_error
+        self.failed = False
+        self.buffer = deque(maxlen=maxlen)
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+
+    def push(self, timestamp, freqs, data):
+        if self.failed:
+            return
+        self.buffer.append((timestamp, freqs, data))
+        self.wakeup.set()
+
+    def _drain(self):
+        frames = []
+        try:
+            while True:
+                frames.append(self.buffer.popleft())
+        except IndexError:
+            pass
+        return frames
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+
+    def run(self):
+        f = None
+        try:
+            while True:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                frames = self._drain()
+                if frames:
+                    if f is None:
+                        new_file = not os.path.exists(self.path)
+                        f = open(self.path, 'a', newline='')
+                        writer = csv.writer(f)
+                        if new_file:
+                            writer.writerow(['Timestamp', 'Frequency (MHz)', 'RSSI (dBm)'])
+                    for frame in frames:
+                        self._write_frame(writer, *frame)
+                    f.flush()
+                if self.stop_event.is_set():
+                    break
+        except OSError as e:
+            self.failed = True
+            self._drain()
+            if self.on_error is not None:
+                self.on_error(f'Logging to {self.path} failed: {e}')
+        finally:
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _write_frame(self, writer, timestamp, freqs, data):
+        writer.writerows([(timestamp, fr, val) for fr, val in zip(freqs.tolist(), data.tolist())])
 
 
 class MainWindow(QMainWindow):
+    # Emitted from the log writer thread; queued to the GUI thread
+    log_error = QtCore.pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle('RSSI Spectrum — Extended GUI')
         self.setMinimumSize(1000, 600)
 
-        self.plot_queue = Queue()
+        self.connection = AirviewConnection()
         self.scanner_thread = None
-        self.scanner_stop_event = threading.Event()
+        self.scanner = None
+        self.scanner_stop_event = None
 
         self.start_freq = DEFAULT_START_FREQ
         self.end_freq = DEFAULT_END_FREQ
@@ -143,14 +268,23 @@ class MainWindow(QMainWindow):
         self.rssi_max = DEFAULT_RSSI_MAX
         self.scan_interval = DEFAULT_SCAN_INTERVAL
         self.logging_enabled = False
-        self.latest_data = []
+        self.latest_data = np.empty(0, dtype=np.int16)
+        # Single-slot box for the newest frame (scanner thread stores, draw
+        # timer takes); every frame is logged by a background writer
+        self._latest_slot = [None]
+        self._slot_lock = threading.Lock()
+        self._log_freqs = None  # cached frequency axis shared by logged frames
+        self.log_error.connect(self._on_log_error, QtCore.Qt.QueuedConnection)
+        self.log_writer = LogWriter(os.path.expanduser('~/rssi_log.csv'), on_error=self.log_error.emit)
+        self.log_writer.start()
+        self._last_ports = None
 
         self._init_ui()
 
-        self.timer = QtCore.QTimer()
-        self.timer.setInterval(200)
-        self.timer.timeout.connect(self._update_plot)
-        self.timer.start()
+        self.draw_timer = QtCore.QTimer()
+        self.draw_timer.setInterval(50)
+        self.draw_timer.timeout.connect(self._redraw_if_dirty)
+        self.draw_timer.start()
 
     def _init_ui(self):
         central = QWidget()
@@ -183,8 +317,14 @@ class MainWindow(QMainWindow):
         self.min_spin = QSpinBox(); self.min_spin.setRange(-200,0); self.min_spin.setValue(self.rssi_min)
         self.max_spin = QSpinBox(); self.max_spin.setRange(-200,0); self.max_spin.setValue(self.rssi_max)
         self.int_spin = QDoubleSpinBox(); self.int_spin.setRange(0.1,10); self.int_spin.setValue(self.scan_interval)
+        # Debounce edits: every change restarts the timer, so a burst of
+        # keystrokes results in a single _apply_config
+        self._cfg_timer = QtCore.QTimer()
+        self._cfg_timer.setSingleShot(True)
+        self._cfg_timer.setInterval(150)
+        self._cfg_timer.timeout.connect(self._apply_config)
         for s in (self.start_spin,self.end_spin,self.step_spin,self.min_spin,self.max_spin,self.int_spin):
-            s.valueChanged.connect(self._update_config)
+            s.valueChanged.connect(lambda _: self._cfg_timer.start())
         for label, w in [('Start Freq',self.start_spin),('End Freq',self.end_spin),('Step (MHz)',self.step_spin),('RSSI Min',self.min_spin),('RSSI Max',self.max_spin),('Interval (s)',self.int_spin)]:
             cfg_layout.addWidget(QLabel(label)); cfg_layout.addWidget(w)
         cfg_group.setLayout(cfg_layout)
@@ -212,10 +352,17 @@ class MainWindow(QMainWindow):
 
     def _refresh_ports(self):
         ports = sorted(set(glob.glob('/dev/ttyACM*') + glob.glob('/dev/ttyUSB*')))
+        if ports == self._last_ports:
+            return
+        self._last_ports = ports
+        current = self.port_combo.currentText()
         self.port_combo.clear()
         self.port_combo.addItems(ports or ['/dev/ttyACM0'])
+        idx = self.port_combo.findText(current)
+        if idx >= 0:
+            self.port_combo.setCurrentIndex(idx)
 
-    def _update_config(self):
+    def _apply_config(self):
         self.start_freq = self.start_spin.value()
         self.end_freq = self.end_spin.value()
         self.freq_step = self.step_spin.value()
@@ -223,6 +370,7 @@ class MainWindow(QMainWindow):
         self.rssi_max = self.max_spin.value()
         self.scan_interval = self.int_spin.value()
         self.canvas.update_limits(self.start_freq, self.end_freq, self.rssi_min, self.rssi_max, self.freq_step)
+        self._log_freqs = None
 
     def _toggle_logging(self, state):
         self.logging_enabled = bool(state)
@@ -231,8 +379,14 @@ class MainWindow(QMainWindow):
         else:
             self.status_label.setText('Logging disabled')
 
+    def _on_log_error(self, message):
+        # The writer thread has stopped; logging cannot be re-enabled
+        self.log_checkbox.setChecked(False)
+        self.log_checkbox.setEnabled(False)
+        self.status_label.setText(f'ERROR: {message}')
+
     def _export_csv(self):
-        if not self.latest_data:
+        if not self.latest_data.size:
             self.status_label.setText('No data to export')
             return
         path, _ = QFileDialog.getSaveFileName(self, 'Export CSV', os.path.expanduser('~/rssi_export.csv'), 'CSV files (*.csv)')
@@ -242,70 +396,94 @@ class MainWindow(QMainWindow):
         with open(path, 'w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(['Frequency (MHz)', 'RSSI (dBm)'])
-            for fr, val in zip(freqs, self.latest_data):
-                writer.writerow([fr, val])
+            writer.writerows(zip(freqs.tolist(), self.latest_data.tolist()))
         self.status_label.setText(f'Exported to {path}')
 
     def _start_scan(self):
         port = self.port_combo.currentText()
-        self.scanner_stop_event.clear()
-        self.scanner_thread = ScannerThread(port, self.scan_interval, self._scanner_callback, self.scanner_stop_event)
+        # Fresh stop event per worker, so a worker still shutting down is
+        # never revived by this start
+        self.scanner_stop_event = threading.Event()
+        self.scanner_thread = QtCore.QThread(self)
+        self.scanner = ScannerWorker(port, self.scan_interval, self.connection, self.scanner_stop_event)
+        self.scanner.moveToThread(self.scanner_thread)
+        self.scanner_thread.started.connect(self.scanner.run)
+        self.scanner.finished.connect(self.scanner_thread.quit, QtCore.Qt.DirectConnection)
+        self.scanner_thread.finished.connect(self.scanner.deleteLater)
+        self.scanner_thread.finished.connect(self.scanner_thread.deleteLater)
+        self.scanner_thread.finished.connect(self._on_scanner_finished)
+        self.scanner.rssi_ready.connect(self._on_rssi, QtCore.Qt.DirectConnection)
+        self.scanner.status.connect(self.status_label.setText, QtCore.Qt.QueuedConnection)
+        self.scanner.error.connect(self._on_scanner_error, QtCore.Qt.QueuedConnection)
         self.scanner_thread.start()
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.status_label.setText('Scanning...')
 
     def _stop_scan(self):
+        # The scanner thread stops the scan itself once the event is set;
+        # Start is re-enabled when its thread has finished
         self.scanner_stop_event.set()
-        try:
-            if pyairview.is_scanning():
-                pyairview.stop_scan()
-        except Exception:
-            pass
-        self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
-        self.status_label.setText('Stopped')
+        self.status_label.setText('Stopping...')
 
-    def _scanner_callback(self, tag, data):
-        if tag == 'rssi':
-            self.plot_queue.put(data)
-        elif tag == '__status__':
-            QtCore.QMetaObject.invokeMethod(self.status_label, 'setText', QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, data))
-        elif tag == '__error__':
-            QtCore.QMetaObject.invokeMethod(self.status_label, 'setText', QtCore.Qt.QueuedConnection, QtCore.Q_ARG(str, f'ERROR: {data}'))
+    def _on_scanner_finished(self):
+        self.scanner = None
+        self.scanner_thread = None
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
 
-    def _update_plot(self):
-        try:
-            while True:
-                data = self.plot_queue.get_nowait()
-                if isinstance(data, list) and data:
-                    self.latest_data = data
-                    self.canvas.plot_rssi(data)
-                    if self.logging_enabled:
-                        self._log_data(data)
-        except Empty:
-            pass
+    def _on_scanner_error(self, message):
+        self.status_label.setText(f'ERROR: {message}')
+
+    def _on_rssi(self, data):
+        # Runs in the scanner thread: keep only the newest frame for plotting,
+        # but buffer every frame for logging
+        if isinstance(data, np.ndarray) and data.size:
+            with self._slot_lock:
+                self._latest_slot[0] = data
+            if self.logging_enabled:
+                self._log_data(data)
+
+    def _redraw_if_dirty(self):
+        with self._slot_lock:
+            data = self._latest_slot[0]
+            self._latest_slot[0] = None
+        if data is None:
+            return
+        self.latest_data = data
+        self.canvas.plot_rssi(self.latest_data)
 
     def _log_data(self, data):
-        freqs = np.linspace(self.start_freq, self.end_freq, len(data))
+        # Runs in the scanner thread. Reuse one frequency axis for every logged
+        # frame; it is rebuilt only when the limits or the number of points change.
+        # Read it once so a concurrent _apply_config reset cannot be half-seen.
+        freqs = self._log_freqs
+        if freqs is None or freqs.size != len(data):
+            freqs = np.linspace(self.start_freq, self.end_freq, len(data))
+            self._log_freqs = freqs
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_path = os.path.expanduser('~/rssi_log.csv')
-        new_file = not os.path.exists(log_path)
-        with open(log_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            if new_file:
-                writer.writerow(['Timestamp', 'Frequency (MHz)', 'RSSI (dBm)'])
-            for fr, val in zip(freqs, data):
-                writer.writerow([timestamp, fr, val])
+        self.log_writer.push(timestamp, freqs, data)
 
     def closeEvent(self, e):
-        self.scanner_stop_event.set()
-        try:
-            if pyairview.is_scanning():
-                pyairview.stop_scan()
-            pyairview.disconnect()
-        except Exception:
-            pass
+        stopped = True
+        if self.scanner_thread is not None:
+            self.scanner.disconnect_on_exit = True
+            self.scanner_stop_event.set()
+            self.scanner_thread.quit()
+            stopped = self.scanner_thread.wait(2000)
+            if not stopped:
+                # Scanner is stuck inside a pyairview call: close anyway, but
+                # detach its thread so it is not destroyed while running. The
+                # worker still disconnects if the call ever returns.
+                self.scanner_thread.setParent(None)
+                _detached_scanners.append((self.scanner_thread, self.scanner))
+        if stopped:
+            # No scanner thread is running, so nothing else can be inside
+            # pyairview (no-op if the worker already closed it)
+            self.connection.close()
+        self.log_writer.stop()
+        self.log_writer.join(timeout=2.0)
         e.accept()
 
 
@@ -1,8 +1,9 @@
 import re
 import time
+import numpy as np
 import matplotlib.pyplot as plt
 import threading
-from queue import Queue
+from queue import Queue, Empty
 import pyairview
 
 # Store the RSSI values in a global list
@@ -13,29 +14,41 @@ plot_data_queue = Queue()
 START_FREQ = 2399.0  # MHz
 END_FREQ = 2485.0  # MHz
 FREQ_STEP = 0.5  # MHz
+MAX_POINTS = int(round((END_FREQ - START_FREQ) / FREQ_STEP)) + 1
 
 # Fixed RSSI range for the plot (adjust this if your data has a wider range)
 RSSI_MIN = -100  # dBm
 RSSI_MAX = -40   # dBm
 
+# Pattern for the "Received X RSSI level readings: [...]" lines
+RSSI_PATTERN = re.compile(r"Received (\d+) RSSI level readings: \[([^\]]*)\]")
+
 def parse_rssi_input(input_text):
     """
-    Extracts RSSI readings from the input text using regex.
+    Extracts RSSI readings from the input text as an int16 NumPy array.
     """
     try:
         # Extract numbers inside square brackets after the "Received X RSSI level readings: "
-        match = re.search(r"Received \d+ RSSI level readings: \[(.*)\]", input_text)
+        match = RSSI_PATTERN.search(input_text)
         if match:
-            rssi_data = match.group(1)
-            # Convert the extracted string into a list of integers
-            readings = list(map(int, rssi_data.split(",")))
-            return readings
+            # Parse the comma-separated readings straight into an array. On a bad
+            # token, NumPy 2.x raises ValueError while older releases stop early
+            # with a DeprecationWarning; the count check catches the latter.
+            count = int(match.group(1))
+            readings = np.fromstring(match.group(2), sep=",", dtype=np.int64)
+            if readings.size != count:
+                raise ValueError(f"expected {count} readings, parsed {readings.size}")
+            # Reject values that would wrap when narrowed to int16
+            limits = np.iinfo(np.int16)
+            if readings.size and (readings.min() < limits.min or readings.max() > limits.max):
+                raise ValueError("RSSI reading out of int16 range")
+            return readings.astype(np.int16)
         else:
             print("No valid RSSI data found in the input.")
-            return []
+            return np.empty(0, dtype=np.int16)
     except Exception as e:
         print(f"Error parsing input: {e}")
-        return []
+        return np.empty(0, dtype=np.int16)
 
 def plot_rssi_spectrum():
     """
@@ -52,26 +65,33 @@ def plot_rssi_spectrum():
     ax.set_xlim(START_FREQ, END_FREQ)
     ax.set_ylim(RSSI_MIN, RSSI_MAX)
 
+    # Frequency axis is computed once and sliced to the number of readings
+    frequencies = np.arange(MAX_POINTS) * FREQ_STEP + START_FREQ
+
     while True:
-        # Get new RSSI data from the queue
-        if not plot_data_queue.empty():
-            rssi_values = plot_data_queue.get()
-
-            # Calculate the number of points based on the frequency range
-            num_points = len(rssi_values)
-            frequencies = [START_FREQ + i * FREQ_STEP for i in range(num_points)]
-
-            # Plot the RSSI values against the frequencies
-            ax.cla()  # Clear the axes
-            ax.set_xlim(START_FREQ, END_FREQ)  # Reset frequency limits
-            ax.set_ylim(RSSI_MIN, RSSI_MAX)    # Reset RSSI limits
-            ax.plot(frequencies, rssi_values, marker='o', linestyle='-', color='b', alpha=0.7)
-            ax.set_title("RSSI Spectrum Analyzer")
-            ax.set_xlabel("Frequency (MHz)")
-            ax.set_ylabel("RSSI Level (dBm)")
-            ax.grid(True)
-            plt.draw()
-            plt.pause(0.1)  # Pause to update the plot
+        # Block for new RSSI data from the queue instead of spinning on empty()
+        try:
+            rssi_values = plot_data_queue.get(timeout=0.1)
+        except Empty:
+            plt.pause(0.01)  # Keep the plot window responsive while idle
+            continue
+
+        # Calculate the number of points based on the frequency range
+        num_points = len(rssi_values)
+        if num_points > frequencies.size:
+            frequencies = np.arange(num_points) * FREQ_STEP + START_FREQ
+
+        # Plot the RSSI values against the frequencies
+        ax.cla()  # Clear the axes
+        ax.set_xlim(START_FREQ, END_FREQ)  # Reset frequency limits
+        ax.set_ylim(RSSI_MIN, RSSI_MAX)    # Reset RSSI limits
+        ax.plot(frequencies[:num_points], rssi_values, marker='o', linestyle='-', color='b', alpha=0.7)
+        ax.set_title("RSSI Spectrum Analyzer")
+        ax.set_xlabel("Frequency (MHz)")
+        ax.set_ylabel("RSSI Level (dBm)")
+        ax.grid(True)
+        plt.draw()
+        plt.pause(0.1)  # Pause to update the plot
 
 def scan_callback(rssi_list):
     """